@@ -3,52 +3,364 @@
 使用 ffmpeg 将 FLAC 文件转换为 MP3 格式
 """
 import os
-import subprocess
 import asyncio
+import collections
+import contextvars
+import functools
 import shutil
+import threading
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple, Union
 import logging
 
+try:
+    # 可选依赖：安装 PyAV 后可在进程内直接编码，省去每个文件启动 ffmpeg 进程的开销
+    import av
+except ImportError:
+    av = None
+
 logger = logging.getLogger(__name__)
 
+# 文件数超过该值时自动分组转换，分摊 ffmpeg 进程启动开销
+AUTO_GROUP_THRESHOLD = 50
+# 自动分组时每个 ffmpeg 进程最多转换的文件数
+MAX_GROUP_SIZE = 16
+
+# 当前工作协程独占的 CPU 核心编号，其启动的 ffmpeg 进程绑定到该核心；为 None 时不绑定
+_worker_core = contextvars.ContextVar("worker_core", default=None)
+
+
+def _flac_duration(path: Path) -> float:
+    """
+    从 FLAC 文件头的 STREAMINFO 块读取音频时长（秒），无法解析时返回 0.0
+    
+    STREAMINFO 必定是第一个元数据块："fLaC" 标记和 4 字节块头之后，
+    块内偏移 10 起的 8 字节依次为 20 位采样率、3 位声道数、5 位位深和 36 位总采样数。
+    只读取文件开头 26 字节，无需启动 ffprobe。
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(26)
+    except OSError:
+        return 0.0
+    if len(header) < 26 or header[:4] != b"fLaC" or header[4] & 0x7F != 0:
+        return 0.0
+    packed = int.from_bytes(header[18:26], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate:
+        return 0.0
+    return total_samples / sample_rate
+
+
+# MPEG 音频帧头中 Layer III 的比特率表 (kbps)，按比特率索引 0~15 排列
+_MP3_BITRATES_V1 = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 0)
+_MP3_BITRATES_V2 = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, 0)
+
+
+def _mp3_bitrate(path: Path) -> int:
+    """
+    从 MP3 文件第一个音频帧的帧头读取比特率 (kbps)，无法解析时返回 0
+    
+    跳过文件开头的 ID3v2 标签后读取 4 字节帧头。固定比特率编码时，
+    ffmpeg 写入的 Info 帧与音频帧使用相同的比特率索引。
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(10)
+            offset = 0
+            if len(header) == 10 and header[:3] == b"ID3":
+                # 标签大小为 4 个 7 位的同步安全整数，不含 10 字节标签头（及可能存在的标签尾）
+                size = (header[6] & 0x7F) << 21 | (header[7] & 0x7F) << 14 | (header[8] & 0x7F) << 7 | (header[9] & 0x7F)
+                offset = 10 + size + (10 if header[5] & 0x10 else 0)
+            f.seek(offset)
+            frame = f.read(4)
+    except OSError:
+        return 0
+    if len(frame) < 4 or frame[0] != 0xFF or frame[1] & 0xE0 != 0xE0:
+        return 0
+    version = (frame[1] >> 3) & 0x03  # 3: MPEG-1，2: MPEG-2，0: MPEG-2.5
+    layer = (frame[1] >> 1) & 0x03  # 1: Layer III
+    if layer != 1 or version == 1:
+        return 0
+    table = _MP3_BITRATES_V1 if version == 3 else _MP3_BITRATES_V2
+    return table[frame[2] >> 4]
+
+
+def is_flac(name: str) -> bool:
+    """判断文件名是否为 FLAC 文件（扩展名不区分大小写，只截取末尾 5 个字符转小写）"""
+    return name[-5:].lower() == ".flac"
+
+
+@functools.lru_cache(maxsize=1)
+def _find_ffmpeg() -> str:
+    """
+    查找系统中的 ffmpeg 可执行文件（结果缓存，多次创建转换器时不再重复遍历 PATH）
+    
+    优先使用环境变量 FFMPEG_BIN 指定的可执行文件。
+    """
+    ffmpeg_name = os.environ.get("FFMPEG_BIN") or ("ffmpeg.exe" if os.name == "nt" else "ffmpeg")
+    ffmpeg_path = shutil.which(ffmpeg_name)
+    if not ffmpeg_path:
+        raise RuntimeError("未找到 ffmpeg，请确保已安装并添加到系统 PATH")
+    return ffmpeg_path
+
 
 class AudioConverter:
     """音频转换器类"""
     
-    def __init__(self):
-        """初始化转换器，检查 ffmpeg 是否可用"""
-        self.ffmpeg_path = self._find_ffmpeg()
-        if not self.ffmpeg_path:
-            raise RuntimeError("未找到 ffmpeg，请确保已安装并添加到系统 PATH")
+    def __init__(self, use_pyav: Optional[bool] = None):
+        """
+        初始化转换器，检查 ffmpeg 是否可用
+        
+        Args:
+            use_pyav: 是否使用 PyAV 在进程内转换单个文件；为 None 时由环境变量
+                FLAC2MP3_PYAV=1 决定。未安装 PyAV 时始终使用 ffmpeg 子进程
+        """
+        self.ffmpeg_path = _find_ffmpeg()
+        if use_pyav is None:
+            use_pyav = os.environ.get("FLAC2MP3_PYAV") == "1"
+        self.use_pyav = use_pyav and av is not None
+        # 所有命令共用的全局参数
+        self._global_args = (
+            self.ffmpeg_path,
+            "-nostdin",  # 不读取标准输入，避免在无终端环境下挂起
+            "-hide_banner", "-loglevel", "error",  # 只输出错误信息，减少 stderr 数据量
+            # 采样格式转换等滤镜图使用多线程初始化和处理
+            "-filter_threads", "2", "-filter_complex_threads", "2",
+            "-y",  # 覆盖已存在的文件
+        )
+        # 按比特率缓存的编码参数
+        self._encode_args_cache: Dict[int, Tuple[str, ...]] = {}
+        # 按比特率缓存的 PyAV 编码器选项
+        self._pyav_options_cache: Dict[int, Dict[str, str]] = {}
+        # 尚未被工作协程占用的 CPU 核心（仅 Linux）。转换器在所有页面间共用，
+        # 多个批次同时转换时从同一个池中分配，避免不同批次都绑定到编号最小的几个核心
+        self._free_cores: List[int] = (
+            sorted(os.sched_getaffinity(0), reverse=True) if hasattr(os, "sched_getaffinity") else []
+        )
+    
+    def _encode_args(self, bitrate: int) -> Tuple[str, ...]:
+        """
+        获取指定比特率的 MP3 编码参数（按比特率缓存，批量转换时无需重复构造）
+        
+        注意：libmp3lame 没有 GPU 硬件编码路径，NVENC 等硬件加速只适用于视频编码，
+        不要在这里加入 -c:v h264_nvenc 之类的参数。转换速度的提升来自多文件并发，
+        而不是单个文件的硬件加速。
+        """
+        args = self._encode_args_cache.get(bitrate)
+        if args is None:
+            args = (
+                "-codec:a", "libmp3lame",
+                "-b:a", f"{bitrate}k",
+                "-threads", "0",
+            )
+            self._encode_args_cache[bitrate] = args
+        return args
+    
+    def _pyav_options(self, bitrate: int) -> Dict[str, str]:
+        """获取指定比特率的 PyAV 编码器选项（按比特率缓存，同一批次的所有文件共用）"""
+        options = self._pyav_options_cache.get(bitrate)
+        if options is None:
+            options = {"b": str(bitrate * 1000)}
+            self._pyav_options_cache[bitrate] = options
+        return options
     
-    def _find_ffmpeg(self) -> Optional[str]:
-        """查找系统中的 ffmpeg 可执行文件"""
-        ffmpeg_name = "ffmpeg.exe" if os.name == "nt" else "ffmpeg"
-        ffmpeg_path = shutil.which(ffmpeg_name)
-        return ffmpeg_path
+    def _is_up_to_date(self, input_file: Path, output_file: Path, bitrate: int) -> bool:
+        """输出文件已存在、非空、不早于输入文件且比特率与本次设置相同时视为已是最新"""
+        try:
+            dst = output_file.stat()
+            if dst.st_size == 0 or dst.st_mtime < input_file.stat().st_mtime:
+                return False
+        except FileNotFoundError:
+            return False
+        return _mp3_bitrate(output_file) == bitrate
+    
+    @staticmethod
+    def _remove_outputs(output_files: List[Path]) -> None:
+        """删除转换失败或被取消时留下的不完整输出文件，避免之后被当作已转换的文件跳过"""
+        for output_file in output_files:
+            try:
+                output_file.unlink()
+            except OSError:
+                # 文件未创建或无法删除，忽略
+                pass
     
     def _get_flac_files(self, path: Path) -> List[Path]:
         """获取路径中的所有 FLAC 文件"""
-        flac_files = []
+        def _walk(p):
+            # 单次遍历目录树，扩展名不区分大小写
+            try:
+                it = os.scandir(p)
+            except OSError as e:
+                # 无权限等无法读取的目录直接跳过，不影响其余文件
+                logger.warning("跳过无法读取的目录: %s - %s", p, e)
+                return
+            with it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from _walk(entry.path)
+                    elif is_flac(entry.name) and entry.is_file():
+                        yield Path(entry.path)
         
-        if path.is_file():
-            if path.suffix.lower() == ".flac":
-                flac_files.append(path)
-        elif path.is_dir():
+        if path.is_dir():
             # 递归查找目录中的所有 FLAC 文件
-            flac_files = list(path.rglob("*.flac"))
-            # 也支持大写扩展名
-            flac_files.extend(path.rglob("*.FLAC"))
+            return list(_walk(path))
+        if is_flac(path.name) and path.is_file():
+            return [path]
+        return []
+    
+    def _output_path(self, input_file: Path, output_dir: Optional[Path]) -> Path:
+        """确定输出 MP3 文件路径（只计算路径，不创建目录）"""
+        return (output_dir or input_file.parent) / f"{input_file.stem}.mp3"
+    
+    def _pin_process(self, pid: int) -> None:
+        """
+        将 ffmpeg 进程绑定到当前工作协程独占的 CPU 核心（仅 Linux）
         
-        return flac_files
+        并发转换时避免调度器在核心间迁移进程，保持 LAME 的工作集留在各核心缓存中。
+        未分配到核心的工作协程（空闲核心已被其他批次占完）不绑定，由调度器安排。
+        """
+        core = _worker_core.get()
+        if core is None:
+            return
+        try:
+            os.sched_setaffinity(pid, {core})
+        except OSError:
+            # 进程可能已经退出，忽略
+            pass
+    
+    def _output_pairs(self, input_files: List[Path], output_dir: Optional[Path]) -> List[Tuple[Path, Path]]:
+        """
+        计算各输入文件的 (输入, 输出) 路径对，保证输出路径互不相同
+        
+        重复的输入文件只保留一份。不同输入映射到同一输出时（如 a.flac 与 a.FLAC，
+        或不同目录中的同名文件输出到同一目录），后出现的文件依次改名为 "a (2).mp3"、
+        "a (3).mp3" 等，避免多个 ffmpeg 进程同时写同一个文件。
+        比较时忽略大小写，兼容不区分大小写的文件系统。
+        """
+        pairs = []
+        taken = set()
+        for input_file in dict.fromkeys(input_files):
+            output_file = self._output_path(input_file, output_dir)
+            n = 1
+            while str(output_file).casefold() in taken:
+                n += 1
+                output_file = output_file.with_name(f"{input_file.stem} ({n}).mp3")
+            if n > 1:
+                logger.warning("输出文件重名，改为: %s -> %s", input_file, output_file.name)
+            taken.add(str(output_file).casefold())
+            pairs.append((input_file, output_file))
+        return pairs
+    
+    def _split_up_to_date(
+        self,
+        pairs: List[Tuple[Path, Path]],
+        bitrate: int
+    ) -> Tuple[List[Tuple[Path, Path]], List[Tuple[Path, Path]]]:
+        """将 (输入, 输出) 路径对分为需要转换的和输出已是最新的两部分（在线程中执行）"""
+        pending = []
+        up_to_date = []
+        for input_file, output_file in pairs:
+            if self._is_up_to_date(input_file, output_file, bitrate):
+                up_to_date.append((input_file, output_file))
+            else:
+                pending.append((input_file, output_file))
+        return pending, up_to_date
+    
+    @staticmethod
+    async def _read_progress(stream: asyncio.StreamReader, time_callback: Callable[[float], None]):
+        """解析 ffmpeg -progress 输出的键值行，回调已编码的音频时长（秒）"""
+        async for line in stream:
+            # out_time_ms 的单位实际是微秒；开始编码前其值为 N/A
+            if line.startswith(b"out_time_ms="):
+                value = line[12:].strip()
+                if value.isdigit():
+                    time_callback(int(value) / 1_000_000)
+    
+    async def _run_ffmpeg(
+        self,
+        cmd: List[Union[str, Path]],
+        label: str,
+        time_callback: Optional[Callable[[float], None]] = None,
+        output_files: Optional[List[Path]] = None
+    ) -> None:
+        """
+        执行 ffmpeg 命令（异步，不阻塞事件循环）
+        
+        Args:
+            cmd: 完整的 ffmpeg 命令，路径参数可直接传入 Path 对象
+            label: 出错时用于日志和错误信息的描述
+            time_callback: 可选的编码进度回调，参数为已编码的音频时长（秒）；
+                提供时通过 "-progress pipe:1" 从标准输出读取进度
+            output_files: 命令写入的输出文件，转换失败或被取消时删除，不留下不完整的文件
+        
+        Raises:
+            RuntimeError: ffmpeg 返回非零退出码
+        """
+        process = None
+        progress_reader = None
+        if time_callback is not None:
+            # -progress 为全局选项，紧跟在可执行文件之后
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+        try:
+            # 使用异步子进程执行转换，避免阻塞事件循环
+            # 这样可以在转换期间处理 WebSocket 心跳，防止客户端断开连接
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE if time_callback is not None else asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                # Python 3.4+ 创建的文件描述符默认不可继承，无需逐个关闭
+                close_fds=False
+            )
+            self._pin_process(process.pid)
+            if time_callback is not None:
+                # 与 stderr 同时读取，避免进度输出填满管道导致 ffmpeg 阻塞
+                progress_reader = asyncio.ensure_future(self._read_progress(process.stdout, time_callback))
+            
+            # 逐行读取 stderr，只保留最后若干行用于报错，避免缓冲全部输出
+            stderr_tail = collections.deque(maxlen=64)
+            async for line in process.stderr:
+                stderr_tail.append(line)
+            await process.wait()
+            if progress_reader is not None:
+                await progress_reader
+            
+            # 检查返回码
+            if process.returncode != 0:
+                # 安全地解码错误信息
+                stderr_msg = b"".join(stderr_tail).decode("utf-8", errors="replace") or str(process.returncode)
+                error_msg = f"转换失败: {label}\n错误信息: {stderr_msg}"
+                logger.error(error_msg)
+                if output_files:
+                    self._remove_outputs(output_files)
+                raise RuntimeError(error_msg)
+        except asyncio.CancelledError:
+            # 如果任务被取消，尝试终止子进程
+            if progress_reader is not None:
+                progress_reader.cancel()
+            try:
+                if process is not None:
+                    try:
+                        process.terminate()
+                        await process.wait()
+                    except Exception:
+                        pass
+            finally:
+                # 等待进程退出时再次被取消也要删除不完整的输出
+                if output_files:
+                    self._remove_outputs(output_files)
+            raise
     
     async def convert_file(
         self,
         input_file: Path,
         output_dir: Optional[Path] = None,
         bitrate: int = 320,
-        progress_callback: Optional[Callable[[str, int, int], None]] = None
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        skip_existing: bool = False,
+        time_callback: Optional[Callable[[float], None]] = None,
+        output_file: Optional[Path] = None
     ) -> Path:
         """
         转换单个 FLAC 文件为 MP3（异步版本，不阻塞事件循环）
@@ -58,124 +370,324 @@ class AudioConverter:
             output_dir: 输出目录，如果为 None 则输出到输入文件同目录
             bitrate: MP3 比特率 (kbps)
             progress_callback: 进度回调函数 (file_name, current, total)
+            skip_existing: 为 True 时，输出文件已存在、不早于输入文件且比特率相同则跳过转换
+            time_callback: 编码进度回调，参数为已编码的音频时长（秒）
+            output_file: 预先计算好的输出路径，提供时忽略 output_dir，且调用方需保证其目录已存在
         
         Returns:
             输出的 MP3 文件路径
         """
-        if not input_file.exists():
-            raise FileNotFoundError(f"文件不存在: {input_file}")
-        
+        # 不预先检查输入文件是否存在：文件缺失时 ffmpeg 会报错退出，
+        # 错误信息经由 _run_ffmpeg 抛出，省去每个文件一次 stat 调用
         # 确定输出文件路径
-        if output_dir:
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_file = output_dir / f"{input_file.stem}.mp3"
-        else:
-            output_file = input_file.parent / f"{input_file.stem}.mp3"
+        if output_file is None:
+            output_file = self._output_path(input_file, output_dir)
+            if output_dir:
+                output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 输出文件已是最新时跳过（增量转换）
+        if skip_existing and self._is_up_to_date(input_file, output_file, bitrate):
+            logger.info("跳过已转换: %s", output_file.name)
+            return output_file
         
         # 构建 ffmpeg 命令
         cmd = [
-            self.ffmpeg_path,
-            "-i", str(input_file),
-            "-codec:a", "libmp3lame",
-            "-b:a", f"{bitrate}k",
-            "-y",  # 覆盖已存在的文件
-            str(output_file)
+            *self._global_args,
+            "-i", input_file,
+            "-vn", "-sn", "-dn",  # 跳过封面图片、字幕和数据流
+            "-map", "0:a:0",
+            *self._encode_args(bitrate),
+            output_file
         ]
         
-        process = None
+        if self.use_pyav:
+            cancelled = threading.Event()
+            try:
+                # PyAV 编码是阻塞调用，放到线程中执行
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    None, self._encode_with_pyav, input_file, output_file, self._pyav_options(bitrate), cancelled
+                )
+                logger.info("转换成功: %s -> %s", input_file.name, output_file.name)
+                return output_file
+            except asyncio.CancelledError:
+                # 线程无法被强制中断，通知其在处理下一帧前停止，并由线程删除不完整的输出文件
+                cancelled.set()
+                raise
+            except Exception as e:
+                # PyAV 无法处理时（如缺少 libmp3lame 编码器）回退到 ffmpeg 子进程
+                logger.warning("PyAV 转换失败，改用 ffmpeg: %s - %s", input_file.name, e)
+        
         try:
-            # 使用异步子进程执行转换，避免阻塞事件循环
-            # 这样可以在转换期间处理 WebSocket 心跳，防止客户端断开连接
-            import sys
-            encoding = 'utf-8' if sys.platform != 'win32' else 'utf-8'
-            
-            # 创建异步子进程
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            # 等待进程完成，在此期间事件循环可以处理其他任务（如 WebSocket 心跳）
-            stdout, stderr = await process.communicate()
-            
-            # 检查返回码
-            if process.returncode != 0:
-                # 安全地解码错误信息
-                try:
-                    stderr_msg = stderr.decode(encoding, errors='replace') if stderr else str(process.returncode)
-                except (UnicodeDecodeError, AttributeError):
-                    stderr_msg = "无法解码错误信息（编码问题）"
-                error_msg = f"转换失败: {input_file.name}\n错误信息: {stderr_msg}"
-                logger.error(error_msg)
-                raise RuntimeError(error_msg)
-            
-            logger.info(f"转换成功: {input_file.name} -> {output_file.name}")
+            await self._run_ffmpeg(cmd, input_file.name, time_callback=time_callback, output_files=[output_file])
+            logger.info("转换成功: %s -> %s", input_file.name, output_file.name)
             return output_file
-        except asyncio.CancelledError:
-            # 如果任务被取消，尝试终止子进程
-            if process is not None:
-                try:
-                    process.terminate()
-                    await process.wait()
-                except Exception:
-                    pass
-            raise
         except Exception as e:
             # 如果不是预期的异常，记录并重新抛出
-            if not isinstance(e, (RuntimeError, FileNotFoundError, asyncio.CancelledError)):
-                logger.error(f"转换过程中出现意外错误: {input_file.name} - {str(e)}", exc_info=True)
+            # 日志被过滤时跳过 traceback 的格式化
+            if not isinstance(e, RuntimeError) and logger.isEnabledFor(logging.ERROR):
+                logger.error("转换过程中出现意外错误: %s - %s", input_file.name, e, exc_info=True)
+            raise
+    
+    @classmethod
+    def _encode_with_pyav(
+        cls,
+        input_file: Path,
+        output_file: Path,
+        options: Dict[str, str],
+        cancelled: threading.Event
+    ):
+        """
+        使用 PyAV 在当前进程内将 FLAC 转换为 MP3（阻塞调用，在线程中执行）
+        
+        cancelled 被设置时在下一帧停止；失败或停止时删除不完整的输出文件。
+        """
+        try:
+            with av.open(str(input_file)) as in_container, av.open(str(output_file), "w", format="mp3") as out_container:
+                in_stream = in_container.streams.audio[0]
+                out_stream = out_container.add_stream("libmp3lame", rate=in_stream.rate, options=options)
+                out_stream.layout = in_stream.layout
+                # 复制标签（在写入文件头之前设置）
+                out_container.metadata.update(in_container.metadata)
+                # 编码器内部会把解码出的帧重采样、重新分帧为 MP3 所需的格式和帧长
+                for frame in in_container.decode(in_stream):
+                    if cancelled.is_set():
+                        raise RuntimeError(f"转换已取消: {input_file.name}")
+                    frame.pts = None
+                    for packet in out_stream.encode(frame):
+                        out_container.mux(packet)
+                # 刷新编码器中剩余的数据
+                for packet in out_stream.encode(None):
+                    out_container.mux(packet)
+        except BaseException:
+            cls._remove_outputs([output_file])
             raise
     
-    def convert_files(
+    async def convert_batch(
+        self,
+        input_files: List[Path],
+        output_dir: Optional[Path] = None,
+        bitrate: int = 320,
+        output_files: Optional[List[Path]] = None
+    ) -> List[Path]:
+        """
+        在同一个 ffmpeg 进程中转换多个 FLAC 文件，分摊进程启动开销
+        
+        任一文件出错时整个进程失败，调用方需自行回退到逐个转换。
+        
+        Args:
+            input_files: 输入的 FLAC 文件路径列表
+            output_dir: 输出目录，如果为 None 则输出到输入文件同目录
+            bitrate: MP3 比特率 (kbps)
+            output_files: 预先计算好的输出路径列表，提供时忽略 output_dir，且调用方需保证其目录已存在
+        
+        Returns:
+            输出的 MP3 文件路径列表，与 input_files 一一对应
+        """
+        if output_files is None:
+            output_files = [self._output_path(f, output_dir) for f in input_files]
+            if output_dir:
+                output_dir.mkdir(parents=True, exist_ok=True)
+        
+        encode_args = self._encode_args(bitrate)
+        cmd = list(self._global_args)
+        for input_file in input_files:
+            cmd += ["-i", input_file]
+        for idx, output_file in enumerate(output_files):
+            cmd += [
+                "-map", f"{idx}:a:0",
+                # 默认所有输出都复制第一个输入的标签，需逐个指定
+                "-map_metadata", str(idx),
+                "-map_chapters", str(idx),
+                *encode_args,
+                output_file
+            ]
+        
+        await self._run_ffmpeg(cmd, f"{len(input_files)} 个文件", output_files=output_files)
+        logger.info("批量转换成功: %d 个文件", len(input_files))
+        return output_files
+    
+    async def convert_files(
         self,
         input_paths: List[Path],
         output_dir: Optional[Path] = None,
         bitrate: int = 320,
-        progress_callback: Optional[Callable[[str, int, int], None]] = None
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+        group_size: Optional[int] = None,
+        skip_existing: bool = False,
+        fraction_callback: Optional[Callable[[float], None]] = None,
+        skip_callback: Optional[Callable[[str], None]] = None
     ) -> List[Path]:
         """
         批量转换 FLAC 文件为 MP3
         
+        每个文件由独立的 ffmpeg 进程转换，互不依赖，因此并发执行，
+        并发数受 CPU 核心数限制，按完成顺序回调进度。
+        待转换文件经有界队列分发给固定数量的工作协程，内存占用与文件总数无关。
+        
         Args:
             input_paths: 输入文件或目录路径列表
             output_dir: 输出目录，如果为 None 则输出到输入文件同目录
             bitrate: MP3 比特率 (kbps)
-            progress_callback: 进度回调函数 (file_name, current, total)
+            progress_callback: 进度回调函数 (file_name, current, total)，每完成一个文件调用一次
+            group_size: 每个 ffmpeg 进程转换的文件数，大于 1 时使用 convert_batch 分组转换；
+                为 None 时自动选择：文件数超过 AUTO_GROUP_THRESHOLD 才分组
+            skip_existing: 为 True 时，输出文件已存在、不早于输入文件且比特率相同则跳过转换
+            fraction_callback: 按音频时长计算的总体进度回调 (0.0 ~ 1.0)，
+                单个文件转换过程中也会持续回调，长文件转换时进度不会停滞
+            skip_callback: 跳过已是最新的文件时回调 (file_name)
         
         Returns:
-            输出的 MP3 文件路径列表
+            输出的 MP3 文件路径列表（包含跳过的已是最新的文件）
         """
-        # 收集所有 FLAC 文件
+        # 收集所有 FLAC 文件（目录遍历是纯系统调用，放到线程中执行，避免阻塞事件循环）
+        loop = asyncio.get_running_loop()
         all_flac_files = []
         for path in input_paths:
-            flac_files = self._get_flac_files(Path(path))
+            flac_files = await loop.run_in_executor(None, self._get_flac_files, Path(path))
             all_flac_files.extend(flac_files)
         
         if not all_flac_files:
             raise ValueError("未找到任何 FLAC 文件")
         
-        total = len(all_flac_files)
+        # 各文件的输出路径只计算一次（重名时自动改名），之后直接传给转换方法
+        pairs = self._output_pairs(all_flac_files, output_dir)
+        total = len(pairs)
         output_files = []
         failed_files = []
+        done = 0
+        # 按音频时长统计进度：各待转换文件的时长、已完成的时长和正在转换的文件已编码的时长
+        durations: Dict[Path, float] = {}
+        total_duration = 0.0
+        finished_duration = 0.0
+        running: Dict[Path, float] = {}
+        
+        def _report_fraction():
+            fraction_callback(min(1.0, (finished_duration + sum(running.values())) / total_duration))
+        
+        def _time_callback(flac_file: Path) -> Optional[Callable[[float], None]]:
+            if not total_duration:
+                return None
+            def _on_time(seconds: float):
+                running[flac_file] = seconds
+                _report_fraction()
+            return _on_time
         
-        for idx, flac_file in enumerate(all_flac_files, 1):
+        def _record(flac_file: Path, output_file: Optional[Path], error: Optional[Exception]):
+            nonlocal done, finished_duration
+            done += 1
+            if flac_file in durations:
+                finished_duration += durations[flac_file]
+                running.pop(flac_file, None)
+                if total_duration:
+                    _report_fraction()
+            if error is None:
+                output_files.append(output_file)
+            else:
+                logger.error("转换失败: %s - %s", flac_file.name, error)
+                failed_files.append((flac_file.name, str(error)))
+            if progress_callback:
+                progress_callback(flac_file.name, done, total)
+        
+        # 输出目录只创建一次
+        if output_dir:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 已是最新的文件直接计入结果，不占用工作协程
+        if skip_existing:
+            pending, up_to_date = await loop.run_in_executor(
+                None, self._split_up_to_date, pairs, bitrate
+            )
+            for flac_file, output_file in up_to_date:
+                logger.info("跳过已转换: %s", output_file.name)
+                if skip_callback:
+                    skip_callback(flac_file.name)
+                _record(flac_file, output_file, None)
+        else:
+            pending = pairs
+        
+        if fraction_callback is not None and pending:
+            # 只读取每个文件开头的 STREAMINFO，放到线程中执行
+            durations = await loop.run_in_executor(
+                None, lambda: {flac_file: _flac_duration(flac_file) for flac_file, _ in pending}
+            )
+            total_duration = sum(durations.values())
+        
+        workers = os.cpu_count() or 4
+        if group_size is None:
+            # PyAV 在进程内转换，没有进程启动开销可分摊，无需分组
+            if len(pending) > AUTO_GROUP_THRESHOLD and not self.use_pyav:
+                # 保证每个核心至少分到一组，避免分组过大导致并发不足
+                group_size = min(MAX_GROUP_SIZE, -(-len(pending) // workers))
+            else:
+                group_size = 1
+        group_size = max(1, group_size)
+        n_groups = -(-len(pending) // group_size)
+        n_workers = min(n_groups, workers)
+        # 有界队列：同一时刻只保留少量待转换分组，第一个文件无需等待全部任务创建即可开始
+        queue = asyncio.Queue(maxsize=n_workers * 2)
+        
+        async def _convert_one(flac_file: Path, output_file: Path):
             try:
-                if progress_callback:
-                    progress_callback(flac_file.name, idx, total)
-                
-                output_file = self.convert_file(
+                # 已在上面筛选过是否最新，这里不再重复检查
+                await self.convert_file(
                     flac_file,
-                    output_dir=output_dir,
-                    bitrate=bitrate
+                    bitrate=bitrate,
+                    time_callback=_time_callback(flac_file),
+                    output_file=output_file
                 )
-                output_files.append(output_file)
+                _record(flac_file, output_file, None)
             except Exception as e:
-                logger.error(f"转换失败: {flac_file.name} - {str(e)}")
-                failed_files.append((flac_file.name, str(e)))
+                _record(flac_file, None, e)
+        
+        async def _producer():
+            for i in range(0, len(pending), group_size):
+                await queue.put(pending[i:i + group_size])
+            for _ in range(n_workers):
+                await queue.put(None)
+        
+        async def _worker():
+            # 每个工作协程从空闲核心池中独占一个核心，其启动的 ffmpeg 进程都绑定到该核心，结束后归还
+            core = self._free_cores.pop() if self._free_cores else None
+            _worker_core.set(core)
+            try:
+                while (group := await queue.get()) is not None:
+                    if len(group) > 1:
+                        try:
+                            await self.convert_batch(
+                                [flac_file for flac_file, _ in group],
+                                bitrate=bitrate,
+                                output_files=[output_file for _, output_file in group]
+                            )
+                            for flac_file, output_file in group:
+                                _record(flac_file, output_file, None)
+                            continue
+                        except Exception as e:
+                            # 分组中有文件出错，逐个重试以定位失败的文件
+                            logger.warning("分组转换失败，改为逐个转换: %s", e)
+                    for flac_file, output_file in group:
+                        await _convert_one(flac_file, output_file)
+            finally:
+                if core is not None:
+                    self._free_cores.append(core)
+        
+        tasks = [asyncio.ensure_future(_producer())]
+        tasks += [asyncio.ensure_future(_worker()) for _ in range(n_workers)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            # 被取消或某个任务出错（如回调抛出异常）时，gather 在第一个子任务结束后立即返回，
+            # 其余工作协程仍在运行。等待全部任务清理完毕（终止 ffmpeg 子进程、删除不完整的
+            # 输出文件、归还 CPU 核心）再向上抛出，调用方返回时不会再有进程写入输出。
+            # 外部取消时 gather 已取消全部子任务，不再重复取消，以免打断它们的清理
+            if not isinstance(e, asyncio.CancelledError):
+                for task in tasks:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
         
         if failed_files:
             failed_msg = "\n".join([f"{name}: {error}" for name, error in failed_files])
-            logger.warning(f"部分文件转换失败:\n{failed_msg}")
+            logger.warning("部分文件转换失败:\n%s", failed_msg)
         
         return output_files
@@ -22,6 +22,8 @@ def index():
 
 if __name__ in {"__main__", "__mp_main__"}:
     # 启动应用
+    # 已安装 uvloop 时（见 requirements.txt，Windows 除外），uvicorn 会自动使用它作为事件循环，
+    # 降低大量 ffmpeg 子进程调度的开销；未安装时回退到标准 asyncio 事件循环
     ui.run(
         title="FLAC to MP3 转换器",
         favicon="🎵",
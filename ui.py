@@ -2,27 +2,127 @@
 NiceGUI 用户界面模块
 实现 FLAC to MP3 转换器的图形界面
 """
-from nicegui import ui
+from nicegui import app, ui
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Optional, Tuple
 import asyncio
-from converter import AudioConverter
+import errno
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+from converter import AudioConverter, is_flac
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 转换过程中进度条和状态文本的刷新间隔（秒），由单个 ui.timer 按此间隔统一刷新
+UI_UPDATE_INTERVAL = 0.1
+
+# 页面样式以静态文件提供，浏览器可缓存，不必在每次连接时随页面下发整段 CSS
+STATIC_DIR = Path(__file__).parent / "static"
+app.add_static_files("/static", STATIC_DIR)
+_HEAD_HTML = '<link rel="stylesheet" href="/static/app.css">'
+
+# 转换质量选项（比特率 -> 显示文本），所有页面共用
+_QUALITY_OPTIONS = {
+    "320": "高质量 (320 kbps) - 推荐",
+    "256": "标准质量 (256 kbps)",
+    "192": "中等质量 (192 kbps)",
+    "128": "普通质量 (128 kbps)"
+}
+
+
+def _is_client_gone(e: RuntimeError) -> bool:
+    """
+    判断 RuntimeError 是否由客户端断开（元素所属客户端已被删除）引起
+    
+    NiceGUI 对此没有专门的异常类型，只能检查错误信息；只转换一次小写，避免重复的字符串操作。
+    """
+    msg = str(e).lower()
+    return "client" in msg or "deleted" in msg
+
+
+@dataclass
+class _UIState:
+    """转换过程中待刷新到界面的最新进度，中间状态直接被覆盖，只保留最后一次"""
+    done: int = 0
+    total: int = 0
+    current_name: str = ""
+    fraction: Optional[float] = None  # 按音频时长计算的进度，转换器报告后优先于文件计数使用
+    dirty: bool = False
+    shown: Tuple[int, int] = (-1, -1)  # 界面上最近一次显示的 (百分比, 已完成数)
+
 
 class ConverterUI:
     """转换器用户界面类"""
     
+    # 每个浏览器连接一个实例，使用 __slots__ 省去实例 __dict__
+    __slots__ = (
+        "converter",
+        "selected_files",
+        "selected_file_names",
+        "is_file_mode",
+        "is_converting",
+        "selected_folder_path",
+        "client_disconnected",
+        "_pending_upload_flush",
+        "_pending_upload_count",
+        "_upload_dir",
+        "_output_dir_validation",
+        "output_dir",
+        "_last_validation",
+        "_progress_timer",
+        "_ui_state",
+        "_hide_progress_task",
+        # UI 组件
+        "file_btn",
+        "folder_btn",
+        "file_path_input",
+        "selected_files_label",
+        "quality_select",
+        "skip_existing_checkbox",
+        "output_dir_input",
+        "output_dir_btn",
+        "output_dir_label",
+        "_active_btn",
+        "_selected_empty",
+        "convert_btn",
+        "progress_bar",
+        "status_label",
+    )
+    
+    # 所有页面共用的转换器实例，首次转换时才创建
+    _shared_converter: Optional[AudioConverter] = None
+    
     def __init__(self):
         """初始化界面"""
-        self.converter = None
-        self.selected_files: List[Path] = []  # 存储文件路径（本地路径）
+        self.converter: Optional[AudioConverter] = None  # 首次转换时通过 _ensure_converter 获取
+        # 存储文件路径（本地路径），用有序字典代替列表，去重查找为 O(1)
+        self.selected_files: Dict[Path, None] = {}
+        # 上传文件的原始文件名，以路径字符串为键，避免每次查找都计算 Path 的哈希
+        self.selected_file_names: Dict[str, str] = {}
         self.is_file_mode = True
         self.is_converting = False
         self.selected_folder_path: Optional[Path] = None  # 存储选择的文件夹路径（用于确定输出目录）
         self.client_disconnected = False  # 标记客户端是否已断开
+        # 上传界面刷新的防抖任务，多个文件连续上传时合并为一次刷新
+        self._pending_upload_flush: Optional[asyncio.Task] = None
+        self._pending_upload_count = 0
+        # 上传文件的持久保存目录（NiceGUI 的临时文件会被自动清理），只在初始化时创建一次
+        self._upload_dir = Path(tempfile.gettempdir()) / "flac2mp3_uploads"
+        self._upload_dir.mkdir(exist_ok=True)
+        # 输出目录输入的防抖验证任务
+        self._output_dir_validation: Optional[asyncio.Task] = None
+        self.output_dir: Optional[Path] = None  # 已验证的输出目录
+        self._last_validation: Optional[Tuple[str, str]] = None  # 输出目录标签上次显示的 (文本, 颜色类)
+        # 转换进度：转换任务只更新 _ui_state 并标记 dirty，由定时器统一刷新到界面；
+        # 定时器在 _setup_ui 中创建一次，只在转换期间激活
+        self._progress_timer = None
+        self._ui_state = _UIState()
+        self._hide_progress_task: Optional[asyncio.Task] = None  # 转换结束后延迟隐藏进度条的任务
         
         # UI 组件
         self.file_btn = None
@@ -30,35 +130,44 @@ class ConverterUI:
         self.file_path_input = None
         self.selected_files_label = None
         self.quality_select = None
+        self.skip_existing_checkbox = None
         self.output_dir_input = None
         self.output_dir_btn = None
         self.output_dir_label = None
+        self._active_btn = None  # 当前高亮的模式按钮
+        self._selected_empty = True  # 已选文件标签当前是否带有 empty 样式
         self.convert_btn = None
         self.progress_bar = None
         self.status_label = None
         
-        self._init_converter()
         self._setup_ui()
     
-    def _init_converter(self):
-        """初始化音频转换器"""
-        try:
-            self.converter = AudioConverter()
-        except RuntimeError as e:
-            logger.error(f"初始化转换器失败: {e}")
-            ui.notify(f"错误: {e}", type="negative", position="top")
+    async def _ensure_converter(self) -> bool:
+        """获取音频转换器，首次使用时才创建，并在所有页面间共用"""
+        if self.converter is None:
+            if ConverterUI._shared_converter is None:
+                try:
+                    # 查找 ffmpeg 需要遍历 PATH，放到线程中执行
+                    loop = asyncio.get_running_loop()
+                    ConverterUI._shared_converter = await loop.run_in_executor(None, AudioConverter)
+                except RuntimeError as e:
+                    logger.error(f"初始化转换器失败: {e}")
+                    ui.notify(f"错误: {e}", type="negative", position="top")
+                    return False
+            self.converter = ConverterUI._shared_converter
+        return True
     
-    def _safe_update_ui(self, update_func, silent=False):
-        """安全更新 UI 元素，捕获客户端断开异常"""
+    def _safe_update_ui(self, update_func, *args, silent=False):
+        """安全更新 UI 元素，捕获客户端断开异常（参数直接传给 update_func，无需再包一层闭包）"""
         # 如果客户端已断开，直接返回，不再尝试更新
         if self.client_disconnected:
             return False
             
         try:
-            update_func()
+            update_func(*args)
             return True
         except RuntimeError as e:
-            if "client" in str(e).lower() or "deleted" in str(e).lower():
+            if _is_client_gone(e):
                 # 客户端已断开，设置标志并记录一次警告
                 if not self.client_disconnected:
                     self.client_disconnected = True
@@ -75,218 +184,42 @@ class ConverterUI:
     def _setup_ui(self):
         """设置用户界面"""
         # 设置页面样式
-        ui.add_head_html("""
-        <style>
-            body {
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Microsoft YaHei', sans-serif;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                min-height: 100vh;
-            }
-            .container {
-                background: white;
-                border-radius: 20px;
-                box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
-                padding: 40px;
-                max-width: 600px;
-                width: 100%;
-                margin: 20px auto;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            .header {
-                text-align: center;
-                margin-bottom: 40px;
-                width: 100%;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            .header h1 {
-                color: #333;
-                font-size: 28px;
-                font-weight: 600;
-                margin-bottom: 8px;
-            }
-            .header p {
-                color: #666;
-                font-size: 14px;
-            }
-            .form-group {
-                margin-bottom: 30px;
-                text-align: center;
-                width: 100%;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            .form-group label {
-                display: block;
-                color: #333;
-                font-size: 14px;
-                font-weight: 500;
-                margin-bottom: 10px;
-                text-align: center;
-            }
-            .file-selector-container {
-                background: #f8f9fa;
-                border-radius: 12px;
-                padding: 16px;
-                box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
-                margin-top: 24px;
-                width: 100%;
-                display: flex;
-                justify-content: center;
-            }
-            .file-selector {
-                display: flex;
-                gap: 12px;
-                justify-content: center;
-            }
-            .file-btn {
-                flex: 1;
-                min-width: 180px;
-                max-width: 180px;
-                width: 180px;
-                padding: 12px 20px;
-                background: #ffffff;
-                border: 1px solid #e0e0e0;
-                border-radius: 10px;
-                text-align: center;
-                font-size: 14px;
-                font-weight: 500;
-                color: #555;
-                cursor: pointer;
-                transition: all 0.2s ease;
-                box-shadow: 0 1px 3px rgba(0, 0, 0, 0.05);
-            }
-            .file-btn:hover {
-                background: #f5f5f5;
-                border-color: #667eea;
-                color: #667eea;
-                transform: translateY(-1px);
-                box-shadow: 0 2px 6px rgba(102, 126, 234, 0.15);
-            }
-            .file-btn.active {
-                background: #667eea;
-                border-color: #667eea;
-                color: white;
-                box-shadow: 0 2px 8px rgba(102, 126, 234, 0.3);
-            }
-            .selected-files {
-                margin-top: 12px;
-                padding: 10px 14px;
-                background: #f8f9fa;
-                border-radius: 8px;
-                font-size: 13px;
-                color: #666;
-                min-height: 36px;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                text-align: center;
-            }
-            .selected-files.empty {
-                color: #999;
-                font-style: italic;
-            }
-            .top-controls {
-                margin-bottom: 30px;
-            }
-            .quality-convert-row {
-                display: flex;
-                gap: 16px;
-                align-items: flex-end;
-                justify-content: center;
-            }
-            .quality-wrapper {
-                flex: 1;
-                max-width: 380px;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-            }
-            .quality-wrapper label {
-                display: block;
-                text-align: center;
-                margin-bottom: 8px;
-            }
-            .quality-convert-row .quality-select {
-                width: 100%;
-                margin: 0;
-            }
-            .info-text {
-                font-size: 12px;
-                color: #999;
-                margin-top: 8px;
-                text-align: center;
-            }
-            .convert-btn {
-                padding: 12px 28px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                color: white;
-                border: none;
-                border-radius: 10px;
-                font-size: 15px;
-                font-weight: 600;
-                cursor: pointer;
-                transition: all 0.2s ease;
-                box-shadow: 0 3px 12px rgba(102, 126, 234, 0.35);
-                min-width: 140px;
-                height: fit-content;
-            }
-            .convert-btn:hover {
-                transform: translateY(-1px);
-                box-shadow: 0 4px 16px rgba(102, 126, 234, 0.45);
-            }
-            .convert-btn:disabled {
-                background: #ccc;
-                cursor: not-allowed;
-                transform: none;
-                box-shadow: none;
-            }
-        </style>
-        """)
+        ui.add_head_html(_HEAD_HTML)
         
         with ui.card().classes("container"):
             # 标题区域
-            with ui.column().classes("header").style("text-align: center; width: 100%; display: flex; flex-direction: column; align-items: center;"):
-                ui.label("🎵 FLAC to MP3 转换器").classes("text-h4 text-weight-bold").style("text-align: center; width: 100%; display: block;")
-                ui.label("轻松将 FLAC 音频文件转换为 MP3 格式").classes("text-body2 text-grey-7").style("text-align: center; width: 100%; display: block;")
+            with ui.column().classes("header"):
+                ui.label("🎵 FLAC to MP3 转换器").classes("text-h4 text-weight-bold centered")
+                ui.label("轻松将 FLAC 音频文件转换为 MP3 格式").classes("text-body2 text-grey-7 centered")
             
             # 比特率选择和开始转换按钮（置顶，并排）
-            with ui.column().classes("form-group top-controls").style("width: 100%;"):
-                with ui.row().classes("quality-convert-row").style("width: 100%; justify-content: center;"):
+            with ui.column().classes("form-group top-controls"):
+                with ui.row().classes("quality-convert-row"):
                     # 质量选择
                     with ui.column().classes("quality-wrapper"):
-                        ui.label("转换质量").classes("text-weight-medium").style("text-align: center;")
-                        self.quality_select = ui.select(
-                            {
-                                "320": "高质量 (320 kbps) - 推荐",
-                                "256": "标准质量 (256 kbps)",
-                                "192": "中等质量 (192 kbps)",
-                                "128": "普通质量 (128 kbps)"
-                            },
-                            value="320"
-                        ).classes("quality-select").style("width: 100%;")
+                        ui.label("转换质量").classes("text-weight-medium centered")
+                        self.quality_select = ui.select(_QUALITY_OPTIONS, value="320").classes("quality-select").style("width: 100%;")
                     
                     # 开始转换按钮
                     self.convert_btn = ui.button(
                         "开始转换",
                         on_click=self._start_conversion
                     ).classes("convert-btn").style("min-width: 140px; padding: 12px 28px; height: fit-content;")
+                
+                # 增量转换：默认关闭，每次都重新转换全部文件
+                self.skip_existing_checkbox = ui.checkbox("跳过已转换的文件（输出已存在且比特率相同）", value=False)
             
             # 输出目录选择区域（隐藏但保留功能）
+            # form-group 自身已水平居中，单个子元素无需再包一层 row
             with ui.column().classes("form-group").style("display: none;"):
-                with ui.row().style("width: 100%; justify-content: center;"):
-                    ui.label("输出目录").classes("text-weight-medium")
+                ui.label("输出目录").classes("text-weight-medium")
                 
-                with ui.row().style("width: 100%; justify-content: center; max-width: 500px; gap: 10px;"):
+                with ui.row().classes("justify-center").style("width: 100%; max-width: 500px; gap: 10px;"):
                     self.output_dir_input = ui.input(
                         label="MP3 输出目录路径",
                         placeholder="例如: C:/Users/username/Music/MP3 或 /Users/username/Music/MP3",
                         value="",
-                        on_change=self._validate_output_dir
+                        on_change=self._schedule_output_dir_validation
                     ).style("flex: 1;")
                     self.output_dir_btn = ui.button(
                         "验证",
@@ -294,11 +227,10 @@ class ConverterUI:
                         icon="check"
                     ).props("outline")
                 
-                with ui.row().style("width: 100%; justify-content: center;"):
-                    self.output_dir_label = ui.label("请输入 MP3 文件的输出目录").classes("text-caption text-grey-6")
+                self.output_dir_label = ui.label("请输入 MP3 文件的输出目录").classes("text-caption text-grey-6")
             
             # 文件选择区域（与效果图一致）
-            with ui.column().classes("form-group").style("width: 100%;"):
+            with ui.column().classes("form-group"):
                 # 路径输入框（隐藏但功能保留）
                 self.file_path_input = ui.input(
                     placeholder="请输入文件或文件夹路径",
@@ -307,11 +239,11 @@ class ConverterUI:
                 ).style("display: none;")
                 
                 # 已选择文件显示
-                self.selected_files_label = ui.label("未选择任何文件").classes("selected-files empty").style("width: 100%; text-align: center;")
+                self.selected_files_label = ui.label("未选择任何文件").classes("selected-files empty")
             
             # 选择文件/文件夹按钮（底部，阴影背景）
-            with ui.card().classes("file-selector-container").style("width: 100%;"):
-                with ui.row().classes("file-selector").style("width: 100%; justify-content: center;"):
+            with ui.card().classes("file-selector-container"):
+                with ui.row().classes("file-selector"):
                     self.file_btn = ui.button("选择文件", on_click=self._set_file_mode).classes("file-btn").style("width: 180px; min-width: 180px; max-width: 180px;")
                     self.folder_btn = ui.button("选择文件夹", on_click=self._set_folder_mode).classes("file-btn").style("width: 180px; min-width: 180px; max-width: 180px;")
             
@@ -319,24 +251,44 @@ class ConverterUI:
             self.progress_bar = ui.linear_progress(value=0.0, show_value=False).classes("w-full mt-4").style("width: 100%; display: none;")
             
             # 状态标签（支持多行显示）
-            self.status_label = ui.label("").classes("text-center mt-2").style("text-align: center; width: 100%; white-space: pre-line;")
+            self.status_label = ui.label("").classes("centered status-text mt-2")
+            
+            # 进度刷新定时器（初始停用，转换期间激活）
+            self._progress_timer = ui.timer(UI_UPDATE_INTERVAL, self._tick_progress, active=False)
         
     def _set_file_mode(self):
         """设置为文件模式（显示路径输入对话框）"""
         self.is_file_mode = True
-        self.file_btn.classes("active", remove="")
-        self.folder_btn.classes(remove="active")
+        self._set_active_button(self.file_btn)
         # 显示路径输入对话框
         self._show_path_input_dialog()
     
     def _set_folder_mode(self):
         """设置为文件夹模式（显示路径输入对话框）"""
         self.is_file_mode = False
-        self.folder_btn.classes("active", remove="")
-        self.file_btn.classes(remove="active")
+        self._set_active_button(self.folder_btn)
         # 显示路径输入对话框
         self._show_path_input_dialog()
     
+    def _set_active_button(self, button):
+        """高亮当前模式按钮，按钮未变化时不发送任何类名更新"""
+        if self._active_btn is button:
+            return
+        if self._active_btn is not None:
+            self._active_btn.classes(remove="active")
+        button.classes("active")
+        self._active_btn = button
+    
+    def _set_selected_empty(self, empty: bool):
+        """切换已选文件标签的 empty 样式，状态未变化时不发送任何类名更新"""
+        if empty == self._selected_empty:
+            return
+        self._selected_empty = empty
+        if empty:
+            self.selected_files_label.classes("empty")
+        else:
+            self.selected_files_label.classes(remove="empty")
+    
     def _show_path_input_dialog(self):
         """显示路径输入对话框"""
         mode_text = "文件" if self.is_file_mode else "文件夹"
@@ -370,28 +322,32 @@ class ConverterUI:
         
         if not path_str:
             self.selected_files_label.text = "未选择任何文件"
-            self.selected_files_label.classes("empty", remove="")
-            self.selected_files = []
+            self._set_selected_empty(True)
+            self.selected_files.clear()
             return
         
         try:
             if self.is_file_mode:
                 # 文件模式：支持多个文件路径（用分号分隔）
                 self.selected_folder_path = None  # 清除文件夹路径
-                paths = [p.strip() for p in path_str.split(';') if p.strip()]
+                # 单次遍历分号分隔的路径：先做廉价的扩展名判断，再用一次 is_file() 判断存在性
                 file_paths = []
-                
-                for p in paths:
+                for p in path_str.split(';'):
+                    p = p.strip()
+                    if not p:
+                        continue
                     path = Path(p)
-                    if path.exists() and path.is_file():
-                        if path.suffix.lower() == '.flac':
-                            file_paths.append(path)
-                        else:
-                            logger.warning(f"跳过非 FLAC 文件: {path.name}")
+                    if not is_flac(path.name):
+                        logger.warning("跳过非 FLAC 文件: %s", path.name)
+                    elif path.is_file():
+                        # 转为绝对路径，使同一文件的不同写法只保留一份；
+                        # 用 abspath 做纯字符串规范化，不像 resolve() 那样逐级解析符号链接
+                        file_paths.append(Path(os.path.abspath(path)))
                     else:
-                        logger.warning(f"文件不存在: {path}")
+                        logger.warning("文件不存在: %s", path)
                 
-                self.selected_files = file_paths
+                self.selected_files.clear()
+                self.selected_files.update(dict.fromkeys(file_paths))
                 
                 if file_paths:
                     total = len(file_paths)
@@ -402,70 +358,89 @@ class ConverterUI:
                         first_three = ", ".join([f.name for f in file_paths[:3]])
                         display_text = f"已选择 {total} 个文件: {first_three} ... (还有 {total - 3} 个文件)"
                     self.selected_files_label.text = display_text
-                    self.selected_files_label.classes(remove="empty")
+                    self._set_selected_empty(False)
                     ui.notify(f"已选择 {total} 个文件", type="positive")
                 else:
                     self.selected_files_label.text = "未找到有效的 FLAC 文件"
-                    self.selected_files_label.classes("empty", remove="")
+                    self._set_selected_empty(True)
                     ui.notify("未找到有效的 FLAC 文件", type="warning")
             else:
                 # 文件夹模式
                 folder_path = Path(path_str)
-                if folder_path.exists() and folder_path.is_dir():
+                # is_dir() 为 True 时路径必然存在，无需再单独调用 exists()
+                if folder_path.is_dir():
                     # 保存文件夹路径，用于确定输出目录
                     self.selected_folder_path = folder_path
+                    folder_name = folder_path.name
                     # 查找文件夹中的所有 FLAC 文件（只搜索当前目录，不递归）
-                    # 使用 glob 而不是 rglob，避免递归搜索子目录
-                    # 使用集合去重，避免大小写不同导致的重复
-                    flac_files_set = set()
-                    for pattern in ["*.flac", "*.FLAC"]:
-                        for file_path in folder_path.glob(pattern):
-                            # 只包含文件，不包括目录
-                            if file_path.is_file():
-                                flac_files_set.add(file_path)
-                    # 转换为列表并排序，保持顺序一致
-                    flac_files = sorted(list(flac_files_set))
-                    self.selected_files = flac_files
+                    # 单次 scandir 遍历：扩展名不区分大小写，每个文件只出现一次，无需集合去重；
+                    # DirEntry.is_file() 直接使用目录项中的类型信息，通常不需要额外 stat
+                    # 转换顺序无关紧要，保持目录遍历顺序，不做整体排序
+                    with os.scandir(folder_path) as it:
+                        entries = [entry for entry in it if is_flac(entry.name) and entry.is_file()]
+                    flac_files = [Path(entry.path) for entry in entries]
+                    self.selected_files.clear()
+                    self.selected_files.update(dict.fromkeys(flac_files))
                     
                     if flac_files:
                         total = len(flac_files)
-                        folder_name = folder_path.name
                         # 优化多文件显示：如果文件数量很多，只显示文件夹名和数量
                         if total > 10:
                             display_text = f"已选择文件夹: {folder_name} (包含 {total} 个 FLAC 文件)"
                         else:
-                            # 文件数量不多时，显示部分文件名
-                            file_names_preview = ", ".join([f.name for f in flac_files[:3]])
+                            # 文件数量不多时，显示按名称排在最前的几个文件名（只选出前 3 个，无需整体排序）
+                            file_names_preview = ", ".join(heapq.nsmallest(3, (entry.name for entry in entries)))
                             if total > 3:
                                 display_text = f"已选择文件夹: {folder_name} ({file_names_preview} ... 等 {total} 个文件)"
                             else:
                                 display_text = f"已选择文件夹: {folder_name} ({file_names_preview} 共 {total} 个文件)"
                         self.selected_files_label.text = display_text
-                        self.selected_files_label.classes(remove="empty")
+                        self._set_selected_empty(False)
                         ui.notify(f"已找到 {total} 个 FLAC 文件", type="positive")
                     else:
                         self.selected_files_label.text = f"文件夹 '{folder_name}' 中未找到 FLAC 文件"
-                        self.selected_files_label.classes(remove="empty")
+                        self._set_selected_empty(False)
                         ui.notify(f"文件夹 '{folder_name}' 中未找到 FLAC 文件", type="warning")
                 else:
                     ui.notify(f"文件夹不存在: {folder_path}", type="negative")
                     self.selected_files_label.text = "文件夹不存在"
-                    self.selected_files_label.classes(remove="empty")
-                    self.selected_files = []
+                    self._set_selected_empty(False)
+                    self.selected_files.clear()
         
         except Exception as e:
             logger.error(f"解析路径失败: {e}", exc_info=True)
             ui.notify(f"路径解析失败: {str(e)}", type="negative")
             self.selected_files_label.text = "路径格式错误"
-            self.selected_files_label.classes("empty", remove="")
-            self.selected_files = []
+            self._set_selected_empty(True)
+            self.selected_files.clear()
+    
+    def _schedule_output_dir_validation(self, e=None):
+        """输入变化时延迟验证输出目录（防抖：连续输入时只验证最后一次）"""
+        if self._output_dir_validation is not None:
+            self._output_dir_validation.cancel()
+        self._output_dir_validation = asyncio.create_task(self._validate_output_dir_later())
+    
+    async def _validate_output_dir_later(self):
+        """等待输入停顿后再验证输出目录"""
+        try:
+            await asyncio.sleep(0.3)
+            self._safe_update_ui(self._validate_output_dir)
+        finally:
+            if self._output_dir_validation is asyncio.current_task():
+                self._output_dir_validation = None
     
-    def _validate_output_dir(self, e=None):
-        """验证输出目录路径"""
+    def _validate_output_dir(self, e=None, probe: bool = False):
+        """
+        验证输出目录路径
+        
+        Args:
+            e: 事件对象（未使用）
+            probe: 为 True 时实际创建并删除测试文件验证可写性，
+                否则只用 os.access 检查权限（输入时的快速验证）
+        """
         if not self.output_dir_input.value:
-            self.output_dir_label.text = "请输入 MP3 文件的输出目录"
-            self.output_dir_label.classes(remove="text-green text-red")
             self.output_dir = None
+            self._set_output_dir_label("请输入 MP3 文件的输出目录", "")
             return
         
         try:
@@ -474,49 +449,68 @@ class ConverterUI:
                 # 验证目录是否可写
                 test_file = path / ".test_write"
                 try:
-                    test_file.touch()
-                    test_file.unlink()
+                    if probe:
+                        test_file.touch()
+                        test_file.unlink()
+                    elif not os.access(path, os.W_OK):
+                        raise PermissionError(path)
                     self.output_dir = path
-                    self.output_dir_label.text = f"✓ 输出目录有效: {path}"
-                    self.output_dir_label.classes(remove="text-red")
-                    self.output_dir_label.classes("text-green")
+                    text, color = f"✓ 输出目录有效: {path}", "text-green"
                 except Exception:
-                    self.output_dir_label.text = f"✗ 目录不可写: {path}"
-                    self.output_dir_label.classes(remove="text-green")
-                    self.output_dir_label.classes("text-red")
                     self.output_dir = None
+                    text, color = f"✗ 目录不可写: {path}", "text-red"
             elif not path.exists():
                 # 检查父目录是否存在
                 parent = path.parent
                 if parent.exists() and parent.is_dir():
-                    self.output_dir_label.text = f"⚠ 目录不存在，转换时将自动创建: {path}"
-                    self.output_dir_label.classes(remove="text-green text-red")
                     self.output_dir = path  # 允许创建新目录
+                    text, color = f"⚠ 目录不存在，转换时将自动创建: {path}", ""
                 else:
-                    self.output_dir_label.text = f"✗ 路径无效，父目录不存在: {path}"
-                    self.output_dir_label.classes(remove="text-green")
-                    self.output_dir_label.classes("text-red")
                     self.output_dir = None
+                    text, color = f"✗ 路径无效，父目录不存在: {path}", "text-red"
             else:
-                self.output_dir_label.text = f"✗ 路径不是目录: {path}"
-                self.output_dir_label.classes(remove="text-green")
-                self.output_dir_label.classes("text-red")
                 self.output_dir = None
+                text, color = f"✗ 路径不是目录: {path}", "text-red"
         except Exception as ex:
-            self.output_dir_label.text = f"✗ 路径格式错误: {str(ex)}"
-            self.output_dir_label.classes(remove="text-green")
-            self.output_dir_label.classes("text-red")
             self.output_dir = None
+            text, color = f"✗ 路径格式错误: {str(ex)}", "text-red"
+        
+        self._set_output_dir_label(text, color)
+    
+    def _set_output_dir_label(self, text: str, color: str):
+        """更新输出目录提示标签，内容和颜色均未变化时不发送任何更新"""
+        if (text, color) == self._last_validation:
+            return
+        self._last_validation = (text, color)
+        self.output_dir_label.text = text
+        self.output_dir_label.classes(color, remove="text-green text-red")
     
     async def _validate_output_dir_click(self):
         """点击验证按钮"""
-        self._validate_output_dir()
+        if self._output_dir_validation is not None:
+            self._output_dir_validation.cancel()
+            self._output_dir_validation = None
+        self._validate_output_dir(probe=True)
         if self.output_dir:
             ui.notify(f"输出目录已设置: {self.output_dir}", type="positive")
         else:
             ui.notify("请检查输出目录路径是否正确", type="warning")
     
-    def _handle_file_upload(self, e):
+    @staticmethod
+    def _persist_upload(temp_path: Path, persistent_file: Path):
+        """将上传的临时文件移动到持久目录（在线程中执行）"""
+        try:
+            # 同一文件系统内直接重命名，无需复制数据
+            os.replace(temp_path, persistent_file)
+        except OSError as ex:
+            if ex.errno != errno.EXDEV:
+                raise
+            # 跨文件系统时回退为复制内容，并保留修改时间
+            shutil.copyfile(temp_path, persistent_file)
+            st = os.stat(temp_path)
+            os.utime(persistent_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    
+    async def _handle_file_upload(self, e):
         """处理文件上传"""
         try:
             # NiceGUI 的 upload 事件结构：
@@ -524,13 +518,10 @@ class ConverterUI:
             # e.file._path - NiceGUI 已保存的临时文件路径
             # e.file.content_type - 文件 MIME 类型
             
-            print(f"\n[DEBUG] ===== 文件上传事件 =====")
-            
             # 从事件对象获取文件信息
             if not hasattr(e, 'file'):
                 error_msg = "事件对象中没有 file 属性"
-                print(f"[ERROR] {error_msg}")
-                print(f"[ERROR] 事件对象: {e}")
+                logger.error(f"{error_msg}: {e}")
                 ui.notify(error_msg, type="negative")
                 return
             
@@ -538,87 +529,107 @@ class ConverterUI:
             file_name = file_obj.name
             temp_path = Path(file_obj._path)  # NiceGUI 的临时文件路径
             
-            print(f"[INFO] 文件名: {file_name}")
-            print(f"[INFO] 文件类型: {file_obj.content_type}")
-            print(f"[INFO] NiceGUI 临时路径: {temp_path}")
-            
             # 检查文件扩展名
-            if not file_name.lower().endswith('.flac'):
+            if not is_flac(file_name):
                 msg = f"跳过非 FLAC 文件: {file_name}"
-                print(f"[WARNING] {msg}")
+                logger.warning(msg)
                 ui.notify(msg, type="warning")
                 return
             
-            # 验证临时文件存在
-            if not temp_path.exists():
-                error_msg = f"NiceGUI 临时文件不存在: {temp_path}"
-                print(f"[ERROR] {error_msg}")
-                ui.notify(error_msg, type="negative")
-                return
-            
-            # 将文件复制到持久的临时目录
+            # 将文件移动到持久的临时目录
             # 因为 NiceGUI 的临时文件会被自动清理
-            import tempfile
-            import shutil
-            
-            persistent_temp_dir = Path(tempfile.gettempdir()) / "flac2mp3_uploads"
-            persistent_temp_dir.mkdir(exist_ok=True)
-            
-            # 使用原始文件名保存
-            persistent_file = persistent_temp_dir / file_name
-            
-            print(f"[INFO] 复制文件到持久目录: {persistent_file}")
-            shutil.copy2(temp_path, persistent_file)
-            
-            if not persistent_file.exists():
-                error_msg = f"复制文件失败: {persistent_file}"
-                print(f"[ERROR] {error_msg}")
+            # 使用原始文件名保存，文件 I/O 放到线程中执行，避免大文件阻塞事件循环
+            persistent_file = self._upload_dir / file_name
+            # 移动失败会直接抛出异常，无需再额外 stat 检查临时文件和目标文件是否存在
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._persist_upload, temp_path, persistent_file)
+            except FileNotFoundError:
+                error_msg = f"NiceGUI 临时文件不存在: {temp_path}"
+                logger.error(error_msg)
                 ui.notify(error_msg, type="negative")
                 return
             
-            print(f"[SUCCESS] 文件已保存: {file_name} ({persistent_file.stat().st_size} 字节)")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("upload %s -> %s (%d bytes)", file_name, persistent_file, persistent_file.stat().st_size)
             
-            # 添加到已选文件列表
+            # 添加到已选文件列表（字典成员判断为 O(1)，无需额外的集合）
             # 使用持久化的文件路径
             if persistent_file not in self.selected_files:
-                self.selected_files.append(persistent_file)
+                self.selected_files[persistent_file] = None
                 # 保存原始文件名映射
-                self.selected_file_names[persistent_file] = file_name
-                print(f"[INFO] 已添加到选择列表，当前共 {len(self.selected_files)} 个文件")
-                print(f"[INFO] 持久路径: {persistent_file}")
-            else:
-                print(f"[INFO] 文件已在列表中，跳过")
+                self.selected_file_names[str(persistent_file)] = file_name
             
-            # 更新显示
-            if self.selected_files:
-                file_names = ", ".join([f.name for f in self.selected_files[:3]])
-                if len(self.selected_files) > 3:
-                    file_names += f" 等共 {len(self.selected_files)} 个文件"
-                display_text = f"已选择 {len(self.selected_files)} 个文件: {file_names}"
-                self.selected_files_label.text = display_text
-                self.selected_files_label.classes(remove="empty")
-                print(f"[UI] 更新显示: {display_text}")
-                ui.notify(f"已添加文件: {file_name}", type="positive")
-            else:
-                self.selected_files_label.text = "未选择任何 FLAC 文件"
-                self.selected_files_label.classes("empty", remove="")
-            
-            print(f"[DEBUG] ===== 文件上传完成 =====\n")
+            # 更新显示（防抖：连续上传多个文件时只刷新一次界面）
+            self._pending_upload_count += 1
+            if self._pending_upload_flush is None:
+                self._pending_upload_flush = asyncio.create_task(self._flush_upload_ui())
         
         except Exception as ex:
-            print(f"\n[ERROR] ===== 处理文件上传时出错 =====")
-            print(f"[ERROR] 错误类型: {type(ex)}")
-            print(f"[ERROR] 错误信息: {ex}")
-            import traceback
-            traceback.print_exc()
             logger.error(f"处理文件上传时出错: {ex}", exc_info=True)
             ui.notify(f"文件上传处理失败: {str(ex)}", type="negative")
-            print(f"[ERROR] ===== 错误处理完成 =====\n")
+    
+    async def _flush_upload_ui(self):
+        """等待一小段时间合并连续的上传事件，然后一次性刷新已选文件显示"""
+        try:
+            await asyncio.sleep(0.1)
+            count = self._pending_upload_count
+            self._pending_upload_count = 0
+            
+            def update():
+                # 后台任务中没有当前元素上下文，借用标签元素定位客户端
+                with self.selected_files_label:
+                    if self.selected_files:
+                        file_names = ", ".join([f.name for f in itertools.islice(self.selected_files, 3)])
+                        if len(self.selected_files) > 3:
+                            file_names += f" 等共 {len(self.selected_files)} 个文件"
+                        self.selected_files_label.text = f"已选择 {len(self.selected_files)} 个文件: {file_names}"
+                        self._set_selected_empty(False)
+                        ui.notify(f"已添加 {count} 个文件", type="positive")
+                    else:
+                        self.selected_files_label.text = "未选择任何 FLAC 文件"
+                        self._set_selected_empty(True)
+            self._safe_update_ui(update)
+        finally:
+            self._pending_upload_flush = None
+    
+    def _tick_progress(self):
+        """定时把最新进度一次性刷新到进度条和状态文本，状态未变化时不发送更新"""
+        state = self._ui_state
+        if self.client_disconnected or not state.dirty or not state.total:
+            return
+        state.dirty = False
+        done, total = state.done, state.total
+        # 整数百分比：只有百分比或已完成数变化时才更新界面，过滤掉细小的时长进度抖动
+        pct = int(state.fraction * 100) if state.fraction is not None else done * 100 // total
+        if (pct, done) == state.shown:
+            return
+        state.shown = (pct, done)
+        status_text = f"已处理 {done}/{total} 个文件 ({pct}%) - 当前: {state.current_name}"
+        self._safe_update_ui(self._show_progress, pct / 100, status_text)
+    
+    def _show_progress(self, value: float, status_text: str):
+        """更新进度条和状态文本"""
+        self.progress_bar.value = value
+        self.status_label.text = status_text
+    
+    def _set_status_text(self, text: str):
+        """更新状态文本"""
+        self.status_label.text = text
+    
+    async def _hide_progress_later(self, delay: float):
+        """等待一段时间后隐藏进度条"""
+        try:
+            await asyncio.sleep(delay)
+            # 客户端已被删除时由 _safe_update_ui 捕获并记录；短暂断线期间的更新会在重连后补发
+            self._safe_update_ui(self.progress_bar.style, "display: none;", silent=True)
+        finally:
+            if self._hide_progress_task is asyncio.current_task():
+                self._hide_progress_task = None
     
     async def _start_conversion(self):
         """开始转换"""
-        if not self.converter:
-            ui.notify("转换器未初始化", type="negative")
+        if not await self._ensure_converter():
             return
         
         if not self.selected_files:
@@ -628,8 +639,14 @@ class ConverterUI:
         if self.is_converting:
             return
         
-        # 获取比特率
+        # 获取比特率和是否跳过已转换的文件
         bitrate = int(self.quality_select.value)
+        skip_existing = bool(self.skip_existing_checkbox.value)
+        
+        # 上一次转换结束后尚未执行的延迟隐藏不再需要
+        if self._hide_progress_task is not None:
+            self._hide_progress_task.cancel()
+            self._hide_progress_task = None
         
         # 更新 UI 状态
         self.is_converting = True
@@ -643,44 +660,28 @@ class ConverterUI:
             self.progress_bar.style("display: block;")
             self.progress_bar.value = 0.0
             self.status_label.text = "准备开始转换..."
-            # 确保UI更新（给浏览器时间渲染）
-            await asyncio.sleep(0.1)
+            # 让出事件循环，UI 刷新由 NiceGUI 自身驱动，无需人为等待
+            await asyncio.sleep(0)
         except RuntimeError as e:
-            if "client" in str(e).lower() or "deleted" in str(e).lower():
+            if _is_client_gone(e):
                 self.client_disconnected = True
                 logger.info("客户端已断开连接")
                 return
             raise
         
         try:
-            # 直接使用选择的文件路径（已经是本地路径，不需要上传）
-            # 使用集合去重，避免重复文件
-            all_flac_files_set = set()
-            
-            print(f"\n[DEBUG] ===== 开始转换 =====")
-            print(f"[DEBUG] 已选择的文件数: {len(self.selected_files)}")
+            # 进度由单个定时器按固定频率刷新，转换任务只更新内存中的计数器
+            self._ui_state = _UIState()
+            self._progress_timer.activate()
             
-            for idx, file_path in enumerate(self.selected_files):
-                print(f"[DEBUG] 检查文件 {idx + 1}: {file_path}")
-                
-                # 确保文件存在且是 FLAC 文件
-                if file_path.exists() and file_path.is_file():
-                    if file_path.suffix.lower() == '.flac':
-                        # 使用文件路径的绝对路径作为键，确保去重
-                        all_flac_files_set.add(file_path.resolve())
-                        print(f"[INFO] ✓ 添加文件: {file_path.name}")
-                    else:
-                        print(f"[WARNING] ✗ 跳过非 FLAC 文件: {file_path.name}")
-                else:
-                    print(f"[ERROR] ✗ 文件不存在或不是文件: {file_path}")
-            
-            # 转换为列表并排序，保持顺序一致
-            all_flac_files = sorted(list(all_flac_files_set))
-            print(f"[INFO] 收集到 {len(all_flac_files)} 个有效的 FLAC 文件（已去重）")
+            # 直接使用选择的文件路径（已经是本地路径，不需要上传）
+            # 路径在选择时已验证并去重，这里不再逐个 stat；文件如在此期间被删除，
+            # ffmpeg 会报错，由转换器按单个文件失败处理
+            all_flac_files = list(self.selected_files)
             
             if not all_flac_files:
                 error_msg = "未找到任何 FLAC 文件。请检查选择的文件路径是否正确。"
-                print(f"[ERROR] {error_msg}")
+                logger.warning(error_msg)
                 ui.notify(error_msg, type="warning")
                 return
             
@@ -692,7 +693,7 @@ class ConverterUI:
                 first_file = all_flac_files[0]
                 parent_dir = first_file.parent
                 mp3_output_dir = parent_dir.parent / "mp3"
-                print(f"[INFO] 文件模式：使用第一个文件的父目录 {parent_dir} 的同级目录创建 mp3 文件夹")
+                logger.debug("文件模式：使用 %s 的同级目录创建 mp3 文件夹", parent_dir)
             else:
                 # 文件夹模式：在选择的文件夹的同级目录创建 mp3 文件夹
                 if self.selected_folder_path:
@@ -701,103 +702,62 @@ class ConverterUI:
                     # 如果没有保存文件夹路径，使用第一个文件的父目录（回退方案）
                     folder_path = all_flac_files[0].parent
                 mp3_output_dir = folder_path.parent / "mp3"
-                print(f"[INFO] 文件夹模式：在文件夹 {folder_path} 的同级目录创建 mp3 文件夹")
+                logger.debug("文件夹模式：使用 %s 的同级目录创建 mp3 文件夹", folder_path)
             
             # 创建输出目录
             try:
                 mp3_output_dir.mkdir(parents=True, exist_ok=True)
-                print(f"[INFO] 输出目录已准备: {mp3_output_dir}")
+                logger.info("输出目录已准备: %s", mp3_output_dir)
             except Exception as ex:
                 error_msg = f"无法创建输出目录: {mp3_output_dir} - {str(ex)}"
-                print(f"[ERROR] {error_msg}")
+                logger.error(error_msg)
                 ui.notify(error_msg, type="negative")
                 return
             
             total = len(all_flac_files)
-            try:
-                self.status_label.text = f"准备转换 {total} 个文件..."
-            except RuntimeError:
-                pass  # 客户端已断开，忽略
+            self._safe_update_ui(self._set_status_text, f"准备转换 {total} 个文件...")
+            self._ui_state.total = total
+            
+            # 转换文件（并发执行，每完成一个文件回调一次，只记录进度不直接更新界面）
+            def on_progress(file_name: str, done: int, total: int):
+                """单个文件转换结束时记录进度"""
+                state = self._ui_state
+                state.done = done
+                state.current_name = file_name
+                state.dirty = True
+            
+            skipped_count = 0
+            
+            def on_skip(file_name: str):
+                """统计因输出已是最新而跳过的文件"""
+                nonlocal skipped_count
+                skipped_count += 1
+            
+            def on_fraction(fraction: float):
+                """按音频时长记录总体进度（单个文件转换过程中也会持续回调）"""
+                state = self._ui_state
+                state.fraction = fraction
+                state.dirty = True
             
-            # 转换文件
-            converted_count = 0
-            failed_count = 0
+            try:
+                output_files = await self.converter.convert_files(
+                    all_flac_files,
+                    output_dir=mp3_output_dir,  # 使用 mp3 目录
+                    bitrate=bitrate,
+                    progress_callback=on_progress,
+                    skip_existing=skip_existing,
+                    fraction_callback=on_fraction,
+                    skip_callback=on_skip
+                )
+            except asyncio.CancelledError:
+                # 任务被取消
+                logger.info("转换任务被取消")
+                raise
             
-            for idx, flac_file in enumerate(all_flac_files, 1):
-                # 检查客户端是否已断开
-                if self.client_disconnected:
-                    logger.info(f"客户端已断开，停止转换。已处理 {idx - 1}/{total} 个文件")
-                    break
-                
-                try:
-                    # 更新进度（0-1之间的值）
-                    progress = idx / total
-                    progress_percent = int(progress * 100)
-                    status_text = f"正在转换: {flac_file.name} ({idx}/{total}) - {progress_percent}%"
-                    
-                    # 直接更新UI元素（不使用lambda，确保响应式更新）
-                    try:
-                        self.progress_bar.value = progress
-                        self.status_label.text = status_text
-                    except RuntimeError as e:
-                        if "client" in str(e).lower() or "deleted" in str(e).lower():
-                            self.client_disconnected = True
-                            logger.info("客户端已断开连接")
-                            break
-                        else:
-                            logger.error(f"更新进度时出错: {e}")
-                    
-                    # 在转换前让出控制权，让事件循环处理 WebSocket 心跳
-                    await asyncio.sleep(0.05)
-                    
-                    # 执行转换（异步版本，不会阻塞事件循环）
-                    # 使用 await 调用异步方法，这样在转换过程中事件循环可以处理其他任务
-                    output_file = await self.converter.convert_file(
-                        flac_file,
-                        output_dir=mp3_output_dir,  # 使用 mp3 目录
-                        bitrate=bitrate
-                    )
-                    
-                    converted_count += 1
-                    
-                    # 更新进度状态（转换成功后）
-                    success_status_text = f"已转换 {idx}/{total} 个文件 ({progress_percent}%) - 当前: {flac_file.name}"
-                    try:
-                        if not self.client_disconnected:
-                            self.status_label.text = success_status_text
-                    except RuntimeError as e:
-                        if "client" in str(e).lower() or "deleted" in str(e).lower():
-                            self.client_disconnected = True
-                            logger.info("客户端已断开连接")
-                            break
-                    
-                    # 让 UI 更新（给浏览器时间渲染和处理 WebSocket）
-                    # 定期让出控制权，保持 WebSocket 连接活跃
-                    await asyncio.sleep(0.1)
-                    
-                except asyncio.CancelledError:
-                    # 任务被取消
-                    logger.info("转换任务被取消")
-                    break
-                except Exception as e:
-                    failed_count += 1
-                    error_msg = f"✗ 失败: {flac_file.name} - {str(e)}"
-                    logger.error(error_msg)
-                    
-                    # 更新进度状态（即使失败也更新）
-                    progress_percent = int((idx / total) * 100)
-                    error_status_text = f"已处理 {idx}/{total} 个文件 ({progress_percent}%) - 当前失败: {flac_file.name}"
-                    try:
-                        if not self.client_disconnected:
-                            self.status_label.text = error_status_text
-                    except RuntimeError as e:
-                        if "client" in str(e).lower() or "deleted" in str(e).lower():
-                            self.client_disconnected = True
-                            logger.info("客户端已断开连接")
-                            break
-                    
-                    # 即使失败也要让出控制权
-                    await asyncio.sleep(0.1)
+            # 返回结果包含跳过的文件，单独统计
+            converted_count = len(output_files) - skipped_count
+            failed_count = total - len(output_files)
+            skipped_msg = f"，跳过 {skipped_count} 个已转换的文件" if skipped_count else ""
             
             # 转换完成
             try:
@@ -805,13 +765,13 @@ class ConverterUI:
                 
                 # 生成完成提示信息
                 if failed_count == 0:
-                    completion_msg = f"✅ 转换完成！成功转换 {converted_count} 个文件"
+                    completion_msg = f"✅ 转换完成！成功转换 {converted_count} 个文件{skipped_msg}"
                     completion_detail = f"所有文件已保存到: {mp3_output_dir}"
                     final_status_text = f"{completion_msg}\n{completion_detail}"
                     self.status_label.text = final_status_text
                     ui.notify(completion_msg, type="positive", timeout=5000)
                 else:
-                    completion_msg = f"⚠️ 转换完成：成功 {converted_count} 个，失败 {failed_count} 个"
+                    completion_msg = f"⚠️ 转换完成：成功 {converted_count} 个，失败 {failed_count} 个{skipped_msg}"
                     completion_detail = f"成功文件已保存到: {mp3_output_dir}"
                     final_status_text = f"{completion_msg}\n{completion_detail}"
                     self.status_label.text = final_status_text
@@ -826,23 +786,27 @@ class ConverterUI:
                 ui.notify(error_msg, type="negative", timeout=5000)
             except RuntimeError:
                 pass  # 客户端已断开，忽略
-            logger.error(error_msg, exc_info=True)
+            # 日志被过滤时跳过 traceback 的格式化
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(error_msg, exc_info=True)
         
         finally:
+            # 停用进度定时器（保留以供下一次转换使用）
+            self._progress_timer.deactivate()
             # 恢复 UI 状态
             self.is_converting = False
             # 注意：如果客户端已断开，不再尝试更新UI
+            # （不检查 websocket 连接：浏览器重连期间连接会暂时断开，此时的更新会在重连后补发）
             if not self.client_disconnected:
                 try:
                     self.convert_btn.enable()
                     self.convert_btn.text = "开始转换"
-                    # 保持进度条和状态标签显示一段时间，让用户看到完成信息
-                    await asyncio.sleep(3)
-                    # 隐藏进度条
-                    self.progress_bar.style("display: none;")
+                    # 保持进度条和状态标签显示一段时间，让用户看到完成信息；
+                    # 在后台任务中延迟隐藏，不占用当前处理函数，按钮恢复后可立即开始下一次转换
+                    self._hide_progress_task = asyncio.create_task(self._hide_progress_later(3))
                 except RuntimeError as e:
-                    # 如果客户端已断开，只记录日志
-                    if "client" in str(e).lower() or "deleted" in str(e).lower():
+                    # 如果客户端已被删除，只记录日志
+                    if _is_client_gone(e):
                         self.client_disconnected = True
                         logger.info("客户端已断开，跳过 UI 状态恢复")
                     else: